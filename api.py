@@ -1,6 +1,13 @@
 import os
-from datetime import datetime
+import json
+import logging
+import aiohttp
 from aiohttp import web
+try:
+    import orjson
+except ImportError:
+    # Fallback to stdlib json if orjson is not installed
+    orjson = None
 try:
     from server import PromptServer
 except ImportError:
@@ -11,154 +18,234 @@ except ImportError:
         print("ComfyUI Auth System: Could not import PromptServer")
         PromptServer = None
 
-from .nodes import auth_manager
+from . import nodes
+from .nodes import get_auth_manager
+
+logger = logging.getLogger('comfyui_auth')
+
+# Premium configuration comes from environment variables, which don't
+# change after process start - resolve them once at import time instead
+# of re-reading the environment on every request
+_IS_PREMIUM = os.environ.get('IS_PREMIUM', '').lower() == 'true'
+_PREMIUM_CONFIG = {
+    'chatApiKey': os.environ.get('COMFY_UI_COPILOT_API_KEY', ''),
+    'rsaPublicKey': os.environ.get('COMFY_UI_COPILOT_PUBLIC_RSA_KEY', ''),
+    'isPremium': True
+} if _IS_PREMIUM else None
+_NON_PREMIUM_CONFIG = {'isPremium': False}
+
+# Decode request bodies with the same serializer the responses use
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# The frontend polls these routes and their payloads never change, so
+# serialize them once instead of rebuilding the dict and re-running
+# json.dumps per request
+_STATUS_BODY = json.dumps({
+    "authenticated": False,
+    "frontend_managed": True,
+    "message": "Authentication is managed by frontend localStorage"
+}).encode()
+_LOGOUT_BODY = json.dumps({
+    "success": True,
+    "message": "Logout handled by frontend localStorage",
+    "frontend_managed": True
+}).encode()
+_CHECK_BODY = json.dumps({
+    "authenticated": False,
+    "frontend_managed": True,
+    "message": "Check localStorage for authentication state"
+}).encode()
+
+
+def _json_response(data, status=200):
+    """web.json_response drop-in that serializes with orjson if available"""
+    if orjson is not None:
+        return web.Response(
+            body=orjson.dumps(data),
+            status=status,
+            content_type='application/json'
+        )
+    return web.json_response(data, status=status)
 
 
 def get_premium_status():
     """Check if this is a premium instance"""
-    is_premium = os.environ.get('IS_PREMIUM', '').lower()
-    return is_premium == 'true'
+    return _IS_PREMIUM
 
 
 def get_premium_env_vars():
     """Get premium environment variables if user is premium"""
-    if not get_premium_status():
-        return None
-    
-    api_key = os.environ.get('COMFY_UI_COPILOT_API_KEY', '')
-    rsa_key = os.environ.get('COMFY_UI_COPILOT_PUBLIC_RSA_KEY', '')
-    
-    return {
-        'chatApiKey': api_key,
-        'rsaPublicKey': rsa_key,
-        'isPremium': True
+    return _PREMIUM_CONFIG
+
+
+# App-scoped key for the shared auth ClientSession (AppKey is only
+# available on aiohttp >= 3.9; fall back to a plain str key)
+if hasattr(web, 'AppKey'):
+    AUTH_SESSION_KEY = web.AppKey('auth_session', aiohttp.ClientSession)
+else:
+    AUTH_SESSION_KEY = 'auth_session'
+
+
+async def _auth_session_ctx(app):
+    """Own the shared auth ClientSession for the app's whole lifecycle"""
+    session = aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=30),
+        connector=aiohttp.TCPConnector(
+            limit=50,
+            keepalive_timeout=75
+        )
+    )
+    app[AUTH_SESSION_KEY] = session
+    yield
+    await session.close()
+
+
+async def _close_auth_session(app):
+    """Close the manager's fallback HTTP session on server shutdown"""
+    # Only close a manager that was actually created - instantiating one
+    # here just to shut it down would defeat the lazy creation
+    if nodes._auth_manager is not None:
+        await nodes._auth_manager.close()
+
+
+@web.middleware
+async def _auth_error_middleware(request, handler):
+    """Turn unexpected auth-route errors into uniform JSON responses"""
+    try:
+        return await handler(request)
+    except web.HTTPException:
+        # Deliberate HTTP responses pass through untouched
+        raise
+    except Exception as e:
+        if request.path.startswith("/auth/"):
+            # The frontend modal renders data.message on failure, so
+            # always include it alongside the raw error
+            return _json_response({
+                "success": False,
+                "message": f"Authentication error: {str(e)}",
+                "error": str(e)
+            }, status=500)
+        # Not one of our routes - let ComfyUI's own handling deal with it
+        raise
+
+
+async def _authenticate(request):
+    """Authenticate user with username and password"""
+    # Fail fast from headers before buffering the body: wrong
+    # content type or an empty body can never authenticate
+    if request.content_type != 'application/json' \
+            or not request.content_length:
+        return _json_response({
+            "success": False,
+            "message": "A JSON body with username and password "
+                       "is required"
+        }, status=400)
+
+    # Auth payloads are tiny - reject oversized bodies from
+    # headers before buffering and parsing them
+    if request.content_length > 4096:
+        return _json_response({
+            "success": False,
+            "message": "Payload too large"
+        }, status=413)
+
+    data = await request.json(loads=_json_loads)
+    username = data.get("username")
+    password = data.get("password")
+
+    if not isinstance(username, str) or not username \
+            or not isinstance(password, str) or not password:
+        return _json_response({
+            "success": False,
+            "message": "Username and password are required"
+        }, status=400)
+
+    success, message, user_data = await get_auth_manager().authenticate(
+        username, password, session=request.app.get(AUTH_SESSION_KEY))
+
+    response_data = {
+        "success": success,
+        "message": message
     }
 
+    # Include user data for frontend localStorage storage
+    if success and user_data:
+        response_data["user_data"] = user_data
+
+        # Add premium configuration if applicable
+        premium_config = get_premium_env_vars()
+        if premium_config:
+            response_data["premium_config"] = premium_config
+            logger.debug("Premium config provided for user: %s", username)
+        else:
+            response_data["premium_config"] = _NON_PREMIUM_CONFIG
+            logger.debug("Non-premium user authenticated: %s", username)
+
+    return _json_response(response_data)
+
+
+async def _auth_status(request):
+    """Get current authentication status - now frontend managed"""
+    # Return indication that auth is frontend-managed
+    return web.Response(
+        body=_STATUS_BODY,
+        content_type='application/json',
+        charset='utf-8'
+    )
+
+
+async def _logout(request):
+    """Logout the current user - handled by frontend localStorage"""
+    get_auth_manager().logout()
+    return web.Response(
+        body=_LOGOUT_BODY,
+        content_type='application/json',
+        charset='utf-8'
+    )
+
+
+async def _check_auth(request):
+    """Check authentication - now frontend managed"""
+    return web.Response(
+        body=_CHECK_BODY,
+        content_type='application/json',
+        charset='utf-8'
+    )
+
+
+async def _premium_check(request):
+    """Check premium status and return current environment values"""
+    is_premium = get_premium_status()
+
+    response_data = {
+        "isPremium": is_premium
+    }
+
+    if is_premium:
+        premium_config = get_premium_env_vars()
+        if premium_config:
+            response_data.update(premium_config)
+
+    return _json_response(response_data)
+
 
 def setup_routes():
     """Setup API routes for authentication"""
-    
+
     if PromptServer is None:
         print("ComfyUI Auth System: PromptServer not available, "
               "skipping route setup")
         return
-    
-    @PromptServer.instance.routes.post("/auth/authenticate")
-    async def authenticate(request):
-        """Authenticate user with username and password"""
-        try:
-            data = await request.json()
-            username = data.get("username")
-            password = data.get("password")
-            
-            if not username or not password:
-                return web.json_response({
-                    "success": False,
-                    "message": "Username and password are required"
-                }, status=400)
-            
-            success, message, user_data = await auth_manager.authenticate(
-                username, password)
-            
-            response_data = {
-                "success": success,
-                "message": message,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            # Include user data for frontend localStorage storage
-            if success and user_data:
-                response_data["user_data"] = user_data
-                
-                # Add premium configuration if applicable
-                premium_config = get_premium_env_vars()
-                if premium_config:
-                    response_data["premium_config"] = premium_config
-                    print(f"✅ Premium config provided for user: {username}")
-                else:
-                    response_data["premium_config"] = {"isPremium": False}
-                    print(f"ℹ️ Non-premium user authenticated: {username}")
-            
-            return web.json_response(response_data)
-            
-        except Exception as e:
-            return web.json_response({
-                "success": False,
-                "message": f"Authentication error: {str(e)}"
-            }, status=500)
 
-    @PromptServer.instance.routes.get("/auth/status")
-    async def get_auth_status(request):
-        """Get current authentication status - now frontend managed"""
-        try:
-            # Return indication that auth is frontend-managed
-            return web.json_response({
-                "authenticated": False,
-                "frontend_managed": True,
-                "message": "Authentication is managed by frontend localStorage",
-                "timestamp": datetime.now().isoformat()
-            })
-        except Exception as e:
-            return web.json_response({
-                "authenticated": False,
-                "frontend_managed": True,
-                "error": str(e)
-            }, status=500)
+    PromptServer.instance.app.cleanup_ctx.append(_auth_session_ctx)
+    PromptServer.instance.app.on_shutdown.append(_close_auth_session)
+    PromptServer.instance.app.middlewares.append(_auth_error_middleware)
 
-    @PromptServer.instance.routes.post("/auth/logout")
-    async def logout(request):
-        """Logout the current user - handled by frontend localStorage"""
-        try:
-            auth_manager.logout()
-            return web.json_response({
-                "success": True,
-                "message": "Logout handled by frontend localStorage",
-                "frontend_managed": True,
-                "timestamp": datetime.now().isoformat()
-            })
-        except Exception as e:
-            return web.json_response({
-                "success": False,
-                "message": f"Logout error: {str(e)}"
-            }, status=500)
-
-    @PromptServer.instance.routes.get("/auth/check")
-    async def check_auth(request):
-        """Check authentication - now frontend managed"""
-        try:
-            return web.json_response({
-                "authenticated": False,
-                "frontend_managed": True,
-                "message": "Check localStorage for authentication state",
-                "timestamp": datetime.now().isoformat()
-            })
-        except Exception as e:
-            return web.json_response({
-                "authenticated": False,
-                "frontend_managed": True,
-                "error": str(e)
-            }, status=500)
-
-    @PromptServer.instance.routes.get("/auth/premium_check")
-    async def premium_check(request):
-        """Check premium status and return current environment values"""
-        try:
-            is_premium = get_premium_status()
-            
-            response_data = {
-                "isPremium": is_premium,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            if is_premium:
-                premium_config = get_premium_env_vars()
-                if premium_config:
-                    response_data.update(premium_config)
-            
-            return web.json_response(response_data)
-            
-        except Exception as e:
-            return web.json_response({
-                "isPremium": False,
-                "error": str(e)
-            }, status=500)
+    # Handlers live at module level so registration just binds them -
+    # no per-import closure re-creation
+    routes = PromptServer.instance.routes
+    routes.post("/auth/authenticate")(_authenticate)
+    routes.get("/auth/status")(_auth_status)
+    routes.post("/auth/logout")(_logout)
+    routes.get("/auth/check")(_check_auth)
+    routes.get("/auth/premium_check")(_premium_check)
@@ -42,8 +42,12 @@ def validate_hmac_signature(payload, signature_header):
             "action": "authenticate"
         }
         
-        # Create message string with sorted keys (same as client)
-        message = json.dumps(message_data, sort_keys=True)
+        # Create canonical compact message with sorted keys (same as
+        # the client's test_hmac.py / AuthManager serialization)
+        message = json.dumps(
+            message_data, separators=(",", ":"), sort_keys=True,
+            ensure_ascii=False
+        )
         
         # Generate expected signature
         expected_signature = hmac.new(
